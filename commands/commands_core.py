@@ -2,20 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import os
+import signal
 import subprocess
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Tuple
 
 from pytube import YouTube
-from translate import Translator
 
 from commands.libs.conversor import (
+    AudioConverter,
     MP4Converter,
     PNGConverter,
     ImagemConversorManager,
     ConversorFactory,
 )
-from commands.libs.utils import is_valid_url
+from commands.libs.http_transport import get_transport
+from commands.libs.package_convert.dedup import DedupIndex
+from commands.libs.package_convert.models import BaseIMGConverter
+from commands.libs.package_convert.watcher import FolderWatcher
+from commands.libs.utils import is_valid_url, parse_target_format
 from commands.libs.youtube_manager import AudioEditor, YoutubeDownloader, YoutubeSearch
 
 
@@ -43,7 +48,9 @@ class CommandManager:
             ["translate", "traduzir", "traduz", "traduza", "t"], TranslateCommand()
         )
         self.add_command(["help"], HelpCommand(self.commands))
+        self.add_command(["net", "rede", "network-stats"], NetworkStatsCommand())
         self.add_command(["convert", "converter", "converta"], Converter())
+        self.add_command(["watch", "observar", "monitorar"], WatchCommand())
         self.add_command(["calc", "calculadora", "calcula"], Calculator())
         self.add_command(
             ["download", "baixar", "baixar-musica"], DownloadMusicCommand()
@@ -166,17 +173,59 @@ class AsyncTaskCommand(Command):
 
 
 class TranslateCommand(Command):
+    API_URL = "https://api.mymemory.translated.net/get"
+
+    def __init__(self, from_lang: str = "en", to_lang: str = "pt") -> None:
+        self.from_lang = from_lang
+        self.to_lang = to_lang
+        self.transport = get_transport()
+
     async def execute(self, args: List[str]) -> None:
         if not args:
             print("\nPor favor, forneça uma frase para tradução.")
             return
 
         phrase_to_translate = " ".join(args)
-        translator = Translator(to_lang="pt")
-        translation = translator.translate(phrase_to_translate)
+        try:
+            translation = await asyncio.to_thread(self.translate, phrase_to_translate)
+        except Exception as e:
+            print(f"\nErro na tradução: {e}")
+            return
 
         print(f"\nTradução de '{phrase_to_translate}': {translation}")
 
+    def translate(self, text: str) -> str:
+        """
+        Translates a text with the MyMemory API through the shared transport.
+
+        Args:
+            text (str): The text to be translated.
+
+        Returns:
+            str: The translated text.
+        """
+        response = self.transport.get(
+            self.API_URL,
+            params={"q": text, "langpair": f"{self.from_lang}|{self.to_lang}"},
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        # Erros de cota e de idioma também chegam com HTTP 200
+        if int(data.get("responseStatus", 200)) != 200:
+            raise RuntimeError(data.get("responseDetails") or "resposta inválida")
+        return data["responseData"]["translatedText"]
+
+
+class NetworkStatsCommand(Command):
+    async def execute(self, args: List[str]) -> None:
+        stats = get_transport().stats()
+        print("\nEstatísticas de rede:")
+        print(f"\tRequisições: {stats['requests']}")
+        print(f"\tConexões abertas: {stats['connections_opened']}")
+        print(f"\tConexões reutilizadas: {stats['connections_reused']}")
+        print(f"\tTempo em limite de taxa: {stats['throttled_seconds']}s")
+
 
 class Converter(Command):
     async def execute(self, args: List[str]) -> None:
@@ -194,20 +243,148 @@ class Converter(Command):
         if not target_format.startswith("-"):
             print("Por favor, forneça a extensão do arquivo a ser convertido. Exemplo: convert -jpg caminho/arquivo.ext")
             return
-        
-        args = args[1:]
 
-        # Verifica se o formato é suportado
-        if (
-            target_format in imgs_suported
-            or target_format in videos_suported
-            or target_format in audio_suported
+        # Vários alvos (ex.: convert -png -webp -png:128 caminho) decodificam uma vez
+        targets = []
+        dedup_mode = None
+        dedup_options = {}
+        audio_options = {}
+        while args and args[0].startswith("-"):
+            arg = args.pop(0)
+            option, _, value = arg.partition("=")
+            try:
+                # --dedup ignora duplicatas; --dedup=link reaproveita a saída
+                if option == "--dedup":
+                    dedup_mode = value or "skip"
+                # --phash[=N] também ignora imagens parecidas (até N bits diferentes)
+                elif option == "--phash":
+                    dedup_options["perceptual"] = True
+                    if value:
+                        dedup_options["threshold"] = int(value)
+                # Áudio: --bitrate=192k --rate=44100 --channels=2 --normalize=-16
+                elif option == "--bitrate":
+                    audio_options["bitrate"] = value
+                elif option == "--rate":
+                    audio_options["sample_rate"] = int(value)
+                elif option == "--channels":
+                    audio_options["channels"] = int(value)
+                elif option == "--normalize":
+                    audio_options["normalize"] = True
+                    if value:
+                        audio_options["target_dbfs"] = float(value)
+                else:
+                    targets.append(parse_target_format(arg))
+            except ValueError as e:
+                print(e)
+                return
+
+        if not targets:
+            print("Por favor, forneça a extensão do arquivo a ser convertido.")
+            return
+
+        if dedup_options and dedup_mode is None:
+            print("A opção --phash só pode ser usada junto com --dedup.")
+            return
+
+        if dedup_mode is not None and any(
+            target_format in videos_suported for target_format, _ in targets
         ):
+            print("A deduplicação não é suportada para vídeos.")
+            return
+
+        path = " ".join(args)
+        if not path:
+            print("Por favor, forneça o caminho a ser convertido.")
+            return
+
+        dedup = None
+        if dedup_mode is not None:
+            try:
+                dedup = DedupIndex.for_path(path, mode=dedup_mode, **dedup_options)
+            except ValueError as e:
+                print(e)
+                return
+
+        # Alvos repetidos (ex.: -png:128 -png:128x128) escreveriam o mesmo arquivo
+        targets = list(dict.fromkeys(targets))
+
+        if len(targets) > 1 or targets[0][1] is not None:
+            self.convert_many(path, targets, imgs_suported, videos_suported, dedup)
+            return
+
+        target_format = targets[0][0]
+
+        # Áudio: arquivos e diretórios são codificados em paralelo
+        if target_format in audio_suported:
+            AudioConverter(target_format, **audio_options).process_path(path, dedup)
+            return
+
+        # Verifica se o formato é suportado
+        if target_format in imgs_suported or target_format in videos_suported:
             conversor = ConversorFactory.criar_conversor(target_format)
-            conversor.convert(" ".join(args), target_format)
+            if dedup is not None:
+                conversor.process_path(path, dedup)
+            else:
+                conversor.convert(path, target_format)
         else:
             print(f"Formato alvo {target_format} não suportado.")
 
+    def convert_many(
+        self,
+        path: str,
+        targets: List[Tuple[str, Optional[Tuple[int, int]]]],
+        imgs_suported: List[str],
+        videos_suported: List[str],
+        dedup: Optional[DedupIndex] = None,
+    ) -> None:
+        formats = [target_format for target_format, _ in targets]
+
+        if all(target_format in imgs_suported for target_format in formats):
+            try:
+                BaseIMGConverter().process_path_many(path, targets, dedup)
+            except ValueError as e:
+                print(e)
+        elif all(target_format in videos_suported for target_format in formats):
+            renditions = [
+                (target_format[1:].upper(), size)
+                for target_format, size in targets
+            ]
+            MP4Converter().start_multi_conversion(path, renditions)
+        else:
+            print("Os formatos alvo devem ser todos de imagem ou todos de vídeo.")
+
+
+class WatchCommand(Command):
+    async def execute(self, args: List[str]) -> None:
+        formats = [arg for arg in args if arg.startswith("-")]
+        directory = " ".join(arg for arg in args if not arg.startswith("-"))
+
+        if len(formats) != 1 or not directory:
+            print("Uso: watch caminho/diretorio -png")
+            return
+
+        try:
+            conversor = ConversorFactory.criar_conversor(formats[0].lower())
+            watcher = FolderWatcher(directory, conversor)
+        except (ValueError, NotADirectoryError) as e:
+            print(e)
+            return
+
+        # O asyncio.run só cancelaria a tarefa no Ctrl+C; aqui ele para o watcher
+        previous_handler = signal.signal(
+            signal.SIGINT, lambda signum, frame: watcher.stop()
+        )
+        try:
+            await asyncio.to_thread(watcher.run)
+        except asyncio.CancelledError:
+            watcher.stop()
+            # Mantém o bot rodando depois da interrupção
+            task = asyncio.current_task()
+            if task is not None:
+                task.uncancel()
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+
 
 class DownloadMusicCommand(Command):
     async def execute(self, args: List[str]) -> None:
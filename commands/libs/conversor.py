@@ -1,15 +1,29 @@
+from __future__ import annotations
+
 import os
+import re
 import shutil
+import subprocess
 import tempfile
-from typing import List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+import numpy as np
 from moviepy.editor import VideoFileClip
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+from PIL import Image
 
 from commands.libs.package_convert.models import (
+    BaseConverter,
     BaseIMGConverter,
     Conversor,
     ConversorManager,
 )
+from commands.libs.utils import get_existent_file_path, is_audio
+
+if TYPE_CHECKING:
+    from commands.libs.package_convert.dedup import DedupIndex
 
 
 class ImagemConversorManager(ConversorManager):
@@ -33,12 +47,18 @@ class PNGConverter(BaseIMGConverter):
         target_format = "PNG"
         return super().convert(file_path, target_format)
 
+    def get_output_path(self, file_path, target_format=None):
+        return super().get_output_path(file_path, "PNG")
+
 
 class JPGConverter(BaseIMGConverter):
     def convert(self, file_path, target_format=""):
         target_format = "JPEG"
         return super().convert(file_path, target_format)
 
+    def get_output_path(self, file_path, target_format=None):
+        return super().get_output_path(file_path, "JPEG")
+
 
 class MP4Converter:
     CODECS = (
@@ -97,6 +117,117 @@ class MP4Converter:
         except Exception as e:
             print(f"Erro: {e}")
 
+    def start_multi_conversion(
+        self,
+        input_path: str,
+        renditions: List[Tuple[str, Optional[Tuple[int, int]]]],
+    ) -> List[str]:
+        """
+        Convert a video file into several formats/resolutions with a single decode.
+
+        Every frame is read once from the source and handed to one ffmpeg writer
+        per rendition, so the encoders run side by side in their own processes.
+        The audio track is extracted once per audio codec and muxed into the
+        outputs.
+
+        Args:
+            input_path (str): The path to the input video file.
+            renditions (List[Tuple[str, Optional[Tuple[int, int]]]]): Pairs of
+                (format, (width, height)). The video is scaled to fit in the given
+                size, keeping its aspect ratio, like the image thumbnails. When the
+                size is None the original resolution is kept.
+
+        Returns:
+            List[str]: The paths of the converted videos.
+        """
+        if not input_path or not renditions:
+            return []
+
+        outputs = []
+        temp_files = []
+        writers = []
+        video_clip = None
+        try:
+            video_clip = VideoFileClip(input_path)
+            width, height = video_clip.size
+            audio_files = {}
+
+            for selected_format, max_size in renditions:
+                codec = self.convert(selected_format.upper())
+                if codec is None:
+                    raise ValueError(f"Formato {selected_format} não suportado.")
+
+                size = (width, height)
+                if max_size:
+                    # Cabe no tamanho pedido sem ampliar; libx264 e afins exigem
+                    # dimensões pares
+                    scale = min(max_size[0] / width, max_size[1] / height, 1)
+                    scaled_width = max(round(width * scale), 2)
+                    scaled_height = max(round(height * scale), 2)
+                    size = (
+                        scaled_width - scaled_width % 2,
+                        scaled_height - scaled_height % 2,
+                    )
+
+                audio_codec = "libvorbis" if codec == "libvpx" else "libmp3lame"
+                if video_clip.audio is not None and audio_codec not in audio_files:
+                    audio_extension = "ogg" if audio_codec == "libvorbis" else "mp3"
+                    temp_audio = tempfile.NamedTemporaryFile(
+                        suffix=f".{audio_extension}", delete=False
+                    )
+                    temp_audio.close()
+                    temp_files.append(temp_audio.name)
+                    video_clip.audio.write_audiofile(
+                        temp_audio.name, codec=audio_codec, logger=None
+                    )
+                    audio_files[audio_codec] = temp_audio.name
+
+                suffix = f"_{size[0]}x{size[1]}" if max_size else ""
+                output_path = self.generate_output_path(
+                    input_path, selected_format.lower(), suffix
+                )
+                # Dois writers não podem escrever no mesmo arquivo ao mesmo tempo
+                if output_path in outputs:
+                    raise ValueError(f"Alvos repetidos para a saída: {output_path}")
+                writers.append(
+                    (
+                        FFMPEG_VideoWriter(
+                            output_path,
+                            size,
+                            video_clip.fps,
+                            codec=codec,
+                            audiofile=audio_files.get(audio_codec),
+                        ),
+                        size,
+                    )
+                )
+                outputs.append(output_path)
+
+            # Decodifica cada frame uma única vez e alimenta todos os encoders
+            for frame in video_clip.iter_frames():
+                for writer, size in writers:
+                    if size != (width, height):
+                        frame_out = np.asarray(
+                            Image.fromarray(frame).resize(size, Image.LANCZOS)
+                        )
+                    else:
+                        frame_out = frame
+                    writer.write_frame(frame_out)
+
+            for output_path in outputs:
+                print(f"Conversão concluída.\nSalvo em: {output_path}")
+            return outputs
+        except Exception as e:
+            print(f"Erro: {e}")
+            return []
+        finally:
+            for writer, _ in writers:
+                writer.close()
+            if video_clip is not None:
+                video_clip.close()
+            for temp_file in temp_files:
+                os.remove(temp_file)
+
     def convert(self, selected_format):
         """
         Convert the selected format to the corresponding codec.
@@ -111,25 +242,473 @@ class MP4Converter:
             if selected_format == extension[0]:
                 return extension[1]
 
-    def generate_output_path(self, input_path):
+    def generate_output_path(self, input_path, extension="mp4", suffix=""):
         """
         Generate a new output path based on the input file's path.
 
         Parameters:
             input_path (str): The path to the input video file.
+            extension (str): The extension of the converted video.
+            suffix (str): Extra text appended to the file name, e.g. "_1280x720".
 
         Returns:
             str: The new output path.
         """
         file_name = os.path.splitext(os.path.basename(input_path))[0]
         output_directory = os.path.dirname(input_path)
-        output_name = f"{file_name}_converted.mp4"
+        output_name = f"{file_name}{suffix}_converted.{extension}"
         output_path = os.path.join(output_directory, output_name)
         return output_path
 
 
-class MP3Converter:
-    ...
+CHANNEL_LAYOUTS = {
+    "mono": 1,
+    "stereo": 2,
+    "2.1": 3,
+    "3.0": 3,
+    "quad": 4,
+    "4.0": 4,
+    "4.1": 5,
+    "5.0": 5,
+    "5.1": 6,
+    "6.0": 6,
+    "6.1": 7,
+    "7.0": 7,
+    "7.1": 8,
+}
+
+
+def _ffmpeg_binary() -> str:
+    from moviepy.config import get_setting
+
+    return get_setting("FFMPEG_BINARY")
+
+
+def _decode_command(input_path: str, sample_rate: int, channels: int) -> List[str]:
+    # Decodifica para PCM float32 intercalado na saída padrão
+    return [
+        _ffmpeg_binary(),
+        "-v",
+        "error",
+        "-i",
+        input_path,
+        "-vn",
+        "-f",
+        "f32le",
+        "-acodec",
+        "pcm_f32le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        str(channels),
+        "-",
+    ]
+
+
+def _iter_pcm_chunks(
+    input_path: str, sample_rate: int, channels: int, chunk_frames: int
+):
+    """Yield the decoded audio as float32 arrays of shape (frames, channels)."""
+    process = subprocess.Popen(
+        _decode_command(input_path, sample_rate, channels),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    chunk_bytes = chunk_frames * channels * 4
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            usable = len(data) - len(data) % (channels * 4)
+            yield np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, channels)
+        finished = True
+    finally:
+        # Gerador fechado antes do fim: o decoder não é mais necessário
+        if not finished:
+            process.kill()
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(stderr.decode(errors="replace").strip())
+
+
+def probe_audio(input_path: str) -> Tuple[int, int]:
+    """
+    Read the sample rate and number of channels of the first audio stream.
+
+    ffprobe is not shipped with imageio-ffmpeg, so the stream description
+    printed by `ffmpeg -i` is parsed instead.
+
+    Args:
+        input_path (str): The path to the input audio file.
+
+    Raises:
+        ValueError: If the audio layout cannot be determined.
+
+    Returns:
+        Tuple[int, int]: The sample rate and the number of channels.
+    """
+    result = subprocess.run(
+        [_ffmpeg_binary(), "-hide_banner", "-i", input_path],
+        capture_output=True,
+    )
+    info = result.stderr.decode(errors="replace")
+    match = re.search(r"Audio: [^\n]*?, (\d+) Hz, ([^,\n]+)", info)
+    if match is None:
+        raise ValueError(f"Nenhuma faixa de áudio encontrada em: {input_path}")
+
+    layout = match.group(2).strip().split("(")[0]
+    channels = CHANNEL_LAYOUTS.get(layout)
+    if channels is None:
+        count = re.match(r"(\d+) channels", layout)
+        if count is None:
+            raise ValueError(
+                f"Layout de canais desconhecido ({layout}); use --rate e --channels."
+            )
+        channels = int(count.group(1))
+    return int(match.group(1)), channels
+
+
+def measure_gain(
+    input_path: str,
+    target_dbfs: float,
+    sample_rate: int,
+    channels: int,
+    chunk_frames: int,
+    peak_dbfs: float = -1.0,
+) -> float:
+    """
+    Compute the linear gain that brings the RMS loudness of a file to target_dbfs.
+
+    The audio is streamed in chunks; each chunk contributes its sum of squares
+    and peak, computed with NumPy. The gain is capped so the loudest sample
+    stays below peak_dbfs.
+
+    Args:
+        input_path (str): The path to the input audio file.
+        target_dbfs (float): The desired RMS level, in dBFS.
+        sample_rate (int): The sample rate used to decode the file.
+        channels (int): The number of channels used to decode the file.
+        chunk_frames (int): The number of frames read at a time.
+        peak_dbfs (float): The maximum peak level after the gain, in dBFS.
+
+    Returns:
+        float: The linear gain (1.0 for silent files).
+    """
+    sum_squares = 0.0
+    samples = 0
+    peak = 0.0
+    for chunk in _iter_pcm_chunks(input_path, sample_rate, channels, chunk_frames):
+        sum_squares += float(np.einsum("ij,ij->", chunk, chunk, dtype=np.float64))
+        samples += chunk.size
+        if chunk.size:
+            peak = max(peak, float(np.abs(chunk).max()))
+
+    if samples == 0 or sum_squares == 0.0:
+        return 1.0
+
+    rms_dbfs = 10 * np.log10(sum_squares / samples)
+    gain = 10 ** ((target_dbfs - rms_dbfs) / 20)
+    return float(min(gain, 10 ** (peak_dbfs / 20) / peak))
+
+
+def transcode_audio(
+    input_path: str,
+    output_path: str,
+    codec: str,
+    bitrate: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None,
+    normalize: bool = False,
+    target_dbfs: float = -20.0,
+    chunk_frames: int = 65536,
+) -> str:
+    """
+    Transcode one audio file, streaming it through ffmpeg.
+
+    Without normalization ffmpeg decodes and encodes on its own. With
+    normalization the file is decoded twice in chunks: once to measure the
+    loudness and once to apply the gain before piping it into the encoder, so
+    the whole clip is never held in memory.
+
+    Args:
+        input_path (str): The path to the input audio file.
+        output_path (str): The path where the converted audio will be saved.
+        codec (str): The ffmpeg audio codec.
+        bitrate (str): The target bitrate, e.g. "192k".
+        sample_rate (int): The target sample rate, e.g. 44100.
+        channels (int): The target number of channels.
+        normalize (bool): Whether to normalize the loudness to target_dbfs.
+        target_dbfs (float): The RMS level used by the normalization, in dBFS.
+        chunk_frames (int): The number of frames streamed at a time.
+
+    Raises:
+        RuntimeError: If ffmpeg fails. The partial output is removed.
+
+    Returns:
+        str: The output path.
+    """
+    existed = os.path.exists(output_path)
+    try:
+        return _transcode_audio(
+            input_path,
+            output_path,
+            codec,
+            bitrate,
+            sample_rate,
+            channels,
+            normalize,
+            target_dbfs,
+            chunk_frames,
+        )
+    except BaseException:
+        # O -n impede sobrescrever um arquivo existente; só apaga o que o ffmpeg criou
+        if not existed and os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+
+def _transcode_audio(
+    input_path: str,
+    output_path: str,
+    codec: str,
+    bitrate: Optional[str],
+    sample_rate: Optional[int],
+    channels: Optional[int],
+    normalize: bool,
+    target_dbfs: float,
+    chunk_frames: int,
+) -> str:
+    encode_options = ["-acodec", codec]
+    if bitrate:
+        encode_options += ["-b:a", bitrate]
+
+    if not normalize:
+        command = [_ffmpeg_binary(), "-n", "-v", "error", "-i", input_path, "-vn"]
+        if sample_rate:
+            command += ["-ar", str(sample_rate)]
+        if channels:
+            command += ["-ac", str(channels)]
+        result = subprocess.run(
+            command + encode_options + [output_path], capture_output=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode(errors="replace").strip())
+        return output_path
+
+    # Mantém a taxa e os canais do arquivo original, como no caminho sem normalização
+    if not sample_rate or not channels:
+        source_rate, source_channels = probe_audio(input_path)
+        sample_rate = sample_rate or source_rate
+        channels = channels or source_channels
+    gain = measure_gain(input_path, target_dbfs, sample_rate, channels, chunk_frames)
+
+    encoder = subprocess.Popen(
+        [
+            _ffmpeg_binary(),
+            "-n",
+            "-v",
+            "error",
+            "-f",
+            "f32le",
+            "-ar",
+            str(sample_rate),
+            "-ac",
+            str(channels),
+            "-i",
+            "-",
+            *encode_options,
+            output_path,
+        ],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    chunks = _iter_pcm_chunks(input_path, sample_rate, channels, chunk_frames)
+    try:
+        for chunk in chunks:
+            encoder.stdin.write(np.clip(chunk * gain, -1.0, 1.0).tobytes())
+    except BrokenPipeError:
+        # O encoder terminou antes da hora; o motivo está no seu stderr
+        pass
+    finally:
+        chunks.close()
+        try:
+            encoder.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = encoder.stderr.read()
+        encoder.stderr.close()
+        returncode = encoder.wait()
+
+    if returncode != 0:
+        raise RuntimeError(stderr.decode(errors="replace").strip())
+    return output_path
+
+
+class AudioConverter(BaseConverter):
+    CODECS = (
+        ("MP3", "libmp3lame"),
+        ("WAV", "pcm_s16le"),
+        ("FLAC", "flac"),
+        ("OGG", "libvorbis"),
+        ("AAC", "aac"),
+    )
+
+    def __init__(
+        self,
+        target_format: str = "MP3",
+        bitrate: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        channels: Optional[int] = None,
+        normalize: bool = False,
+        target_dbfs: float = -20.0,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Audio converter that encodes files on a process pool.
+
+        Args:
+            target_format (str): The default target format, e.g. "MP3" or "-flac".
+            bitrate (str): The target bitrate, e.g. "192k".
+            sample_rate (int): The target sample rate, e.g. 44100.
+            channels (int): The target number of channels.
+            normalize (bool): Whether to normalize the loudness to target_dbfs.
+            target_dbfs (float): The RMS level used by the normalization, in dBFS.
+            max_workers (int): The number of parallel encoders.
+        """
+        self._target_format = target_format.upper().replace("-", "")
+        self.options = {
+            "bitrate": bitrate,
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "normalize": normalize,
+            "target_dbfs": target_dbfs,
+        }
+        self.max_workers = max_workers
+
+    def is_supported_file(self, file_path: str | Path) -> bool:
+        return is_audio(file_path)
+
+    def get_codec(self, target_format: str) -> str:
+        for extension, codec in self.CODECS:
+            if target_format == extension:
+                return codec
+        raise ValueError(f"Formato alvo {target_format} não suportado.")
+
+    def _resolve_format(self, target_format: str = "") -> str:
+        if target_format:
+            return target_format.upper().replace("-", "")
+        return self._target_format
+
+    def dedup_profile(self) -> str:
+        # Formatos e opções diferentes geram saídas diferentes do mesmo áudio
+        options = ",".join(
+            f"{key}={value}" for key, value in sorted(self.options.items())
+        )
+        return f"{type(self).__name__}:{self._target_format}:{options}"
+
+    def get_output_path(self, file_path: str | Path, target_format: str = "") -> Path:
+        extension = f".{self._resolve_format(target_format).lower()}"
+        return Path(file_path).with_suffix(extension)
+
+    def _job(
+        self,
+        file_path: str | Path,
+        target_format: str = "",
+        reserved: Optional[set] = None,
+    ) -> Tuple[str, str, str]:
+        file_path = get_existent_file_path(file_path)
+        target_format = self._resolve_format(target_format)
+        codec = self.get_codec(target_format)
+
+        output_path = self.get_output_path(file_path, target_format)
+        if output_path == file_path:
+            raise FileExistsError(f"{file_path} já está no formato {target_format}.")
+        if output_path.exists():
+            raise FileExistsError(
+                f"Arquivo já convertido: {file_path} -> {output_path}"
+            )
+
+        # Duas fontes do mesmo lote com a mesma saída:
+        # song.flac e song.wav viram song.mp3 e song_wav.mp3
+        if reserved is not None and output_path in reserved:
+            output_path = file_path.with_name(
+                f"{file_path.stem}_{file_path.suffix[1:].lower()}{output_path.suffix}"
+            )
+            if output_path.exists() or output_path in reserved:
+                raise FileExistsError(
+                    f"A saída de {file_path} já existe: {output_path}"
+                )
+        if reserved is not None:
+            reserved.add(output_path)
+        return str(file_path), str(output_path), codec
+
+    def convert(self, file_path: str | Path, target_format: str = "") -> Optional[Path]:
+        try:
+            input_path, output_path, codec = self._job(file_path, target_format)
+            transcode_audio(input_path, output_path, codec, **self.options)
+        except FileExistsError as e:
+            print(e)
+            return None
+        except (RuntimeError, ValueError) as e:
+            print(f"Erro ao converter {file_path}: {e}")
+            return None
+        print(f"Áudio convertido: {input_path} -> {output_path}")
+        return Path(output_path)
+
+    def process_path(
+        self, directory: str | Path, dedup: Optional[DedupIndex] = None
+    ) -> None:
+        if dedup is not None:
+            super().process_path(directory, dedup)
+            return
+
+        jobs = []
+        reserved = set()
+        for file_path in self.iter_files(directory):
+            try:
+                jobs.append(self._job(file_path, reserved=reserved))
+            except (FileExistsError, ValueError) as e:
+                print(e)
+        if not jobs:
+            print(f"Nenhum arquivo de áudio encontrado em: {directory}")
+            return
+
+        # Um único arquivo (ex.: vindo do watch) dispensa o pool de processos
+        if len(jobs) == 1:
+            input_path, output_path, codec = jobs[0]
+            try:
+                transcode_audio(input_path, output_path, codec, **self.options)
+            except (RuntimeError, ValueError) as e:
+                print(f"Erro ao converter {input_path}: {e}")
+            else:
+                print(f"Áudio convertido: {input_path} -> {output_path}")
+            return
+
+        # Cada arquivo é codificado em um processo separado
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    transcode_audio, input_path, output_path, codec, **self.options
+                ): input_path
+                for input_path, output_path, codec in jobs
+            }
+            for future in as_completed(futures):
+                input_path = futures[future]
+                try:
+                    print(f"Áudio convertido: {input_path} -> {future.result()}")
+                except Exception as e:
+                    print(f"Erro ao converter {input_path}: {e}")
+
+
+class MP3Converter(AudioConverter):
+    def __init__(self, **kwargs) -> None:
+        super().__init__("MP3", **kwargs)
 
 
 class ConversorFactory:
@@ -139,6 +718,10 @@ class ConversorFactory:
             return PNGConverter()
         elif target_format == "-jpg":
             return JPGConverter()
+        elif target_format == "-mp3":
+            return MP3Converter()
+        elif target_format in ("-wav", "-flac", "-ogg", "-aac"):
+            return AudioConverter(target_format)
         # Adicione mais lógica para outros formatos, se necessário
         else:
             raise ValueError(f"Formato alvo {target_format} não suportado.")
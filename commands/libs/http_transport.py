@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from typing import Dict, Optional
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0", "accept-language": "en-US,en"}
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Token bucket used to rate limit the requests to one host.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens (the allowed burst).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Blocks until a token is available.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _UrllibResponse:
+    """Exposes a streamed requests response with the urlopen interface."""
+
+    def __init__(self, response: requests.Response, on_close=None) -> None:
+        self._response = response
+        self.status = response.status_code
+        self.reason = response.reason
+        self._on_close = on_close
+        self._consumed = False
+        self.closed = False
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if self.closed:
+            return b""
+        try:
+            data = self._response.raw.read(amt, decode_content=True)
+        except ReadTimeoutError as e:
+            # O urlopen levantaria socket.timeout, que o pytube sabe tratar
+            self.close()
+            raise socket.timeout(str(e)) from e
+        if amt is None or not data:
+            self._consumed = True
+            self.close()
+        return data
+
+    def info(self):
+        return self._response.headers
+
+    def close(self) -> None:
+        """Returns the connection to the pool, or drops it if the body was not read."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._consumed:
+            self._response.raw.release_conn()
+        else:
+            self._response.close()
+        if self._on_close is not None:
+            self._on_close()
+
+    def __enter__(self) -> _UrllibResponse:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # O pytube descarta respostas sem fechá-las (ex.: a do Content-Length)
+        self.close()
+
+
+class HttpTransport:
+    def __init__(
+        self,
+        pool_connections: int = 20,
+        pool_maxsize: int = 10,
+        max_per_host: int = 4,
+        rate: float = 10.0,
+        burst: float = 20.0,
+        timeout: float = 30.0,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+    ) -> None:
+        """
+        Shared HTTP client with keep-alive pooling, per-host limits and retries.
+
+        Args:
+            pool_connections (int): Number of hosts kept in the connection pool.
+            pool_maxsize (int): Connections kept alive per host.
+            max_per_host (int): Concurrent requests allowed per host.
+            rate (float): Requests per second allowed per host.
+            burst (float): Requests allowed in a burst per host.
+            timeout (float): Default timeout, in seconds, for each request.
+            retries (int): Retries for connection errors and RETRY_STATUS.
+            backoff_factor (float): Exponential backoff between retries.
+            backoff_jitter (float): Maximum random seconds added to each backoff.
+        """
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._requests = 0
+        self._throttled_seconds = 0.0
+        self._pytube_installed = False
+
+    def _limits_for(self, host: str):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._semaphores[host], self._buckets[host]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session.
+
+        The call waits for a token of the host's bucket and for a free slot of
+        the host's concurrency limit. The body is read before the slot is freed,
+        so the connection is back in the pool when this method returns.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL to request.
+            **kwargs: Extra arguments for requests.Session.request.
+
+        Returns:
+            requests.Response: The response.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        semaphore, bucket = self._limits_for(urlparse(url).netloc)
+
+        waited = bucket.acquire()
+        with semaphore:
+            response = self.session.request(method, url, **kwargs)
+            response.content  # Consome o corpo e devolve a conexão ao pool
+
+        with self._lock:
+            self._requests += 1
+            self._throttled_seconds += waited
+        return response
+
+    def open(self, method: str, url: str, **kwargs) -> _UrllibResponse:
+        """
+        Sends a request and returns the body as a stream, like urlopen.
+
+        The body is only downloaded as it is read. The host's concurrency slot is
+        held until the response is fully read or closed.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL to request.
+            **kwargs: Extra arguments for requests.Session.request.
+
+        Returns:
+            _UrllibResponse: The streamed response.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        semaphore, bucket = self._limits_for(urlparse(url).netloc)
+
+        waited = bucket.acquire()
+        semaphore.acquire()
+        try:
+            response = self.session.request(method, url, stream=True, **kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        with self._lock:
+            self._requests += 1
+            self._throttled_seconds += waited
+        return _UrllibResponse(response, on_close=semaphore.release)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns counters about the traffic sent through the transport.
+
+        Returns:
+            dict: Requests sent, connections opened and reused, and the seconds
+            spent waiting on the rate limit.
+        """
+        pools = self._adapter.poolmanager.pools
+        opened = served = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                served += pool.num_requests
+
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "connections_opened": opened,
+                "connections_reused": max(served - opened, 0),
+                "throttled_seconds": round(self._throttled_seconds, 3),
+            }
+
+    def install_pytube(self) -> None:
+        """Routes every request made by pytube through this transport."""
+        from pytube import request as pytube_request
+
+        with self._lock:
+            if self._pytube_installed:
+                return
+            self._pytube_installed = True
+
+        def execute_request(
+            url, method=None, headers=None, data=None, timeout=None
+        ) -> _UrllibResponse:
+            if not url.lower().startswith("http"):
+                raise ValueError("Invalid URL")
+            if not isinstance(timeout, (int, float)):
+                timeout = self.timeout
+
+            # O pytube espera os mesmos erros do urlopen
+            try:
+                response = self.open(
+                    method or "GET",
+                    url,
+                    headers=headers,
+                    json=data if isinstance(data, dict) else None,
+                    data=data if not isinstance(data, dict) else None,
+                    timeout=timeout,
+                )
+            except requests.Timeout as e:
+                raise URLError(socket.timeout(str(e))) from e
+            except requests.ConnectionError as e:
+                raise URLError(e) from e
+
+            if response.status >= 400:
+                response.close()
+                raise HTTPError(
+                    url, response.status, response.reason, response.info(), None
+                )
+            return response
+
+        pytube_request._execute_request = execute_request
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """
+    Returns the HTTP transport shared by every command.
+
+    Returns:
+        HttpTransport: The shared instance, created on the first call.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
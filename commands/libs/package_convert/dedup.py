@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from commands.libs.utils import is_img
+
+INDEX_FILE_NAME = ".dedup_index.json"
+CHUNK_SIZE = 1 << 20
+HASH_BITS = 64
+
+
+def content_hash(file_path: str | Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Calcula o SHA-256 de um arquivo sem carregá-lo inteiro na memória.
+
+    Parameters:
+        file_path (str | Path): O caminho do arquivo.
+        chunk_size (int): Quantidade de bytes entregue ao hash por vez.
+
+    Returns:
+        str: O hash em hexadecimal.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+
+        # Lê o arquivo através do mmap, em fatias, sem cópias intermediárias
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                for offset in range(0, size, chunk_size):
+                    digest.update(view[offset : offset + chunk_size])
+    return digest.hexdigest()
+
+
+def perceptual_hash(file_path: str | Path) -> int:
+    """
+    Calcula o hash perceptual (dHash de 64 bits) de uma imagem.
+
+    Imagens visualmente iguais (outra compressão, outro tamanho) geram hashes
+    com poucos bits diferentes.
+
+    Parameters:
+        file_path (str | Path): O caminho da imagem.
+
+    Returns:
+        int: O hash perceptual.
+    """
+    with Image.open(file_path) as img:
+        # Permite ao decoder JPEG reduzir a imagem já na leitura
+        img.draft("L", (64, 64))
+        small = img.convert("L").resize((9, 8), Image.LANCZOS)
+
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    """
+    Calcula a distância de Hamming entre um hash e vários hashes de uma vez.
+
+    Parameters:
+        hashes (np.ndarray): Os hashes, como um array de uint64.
+        value (int): O hash a ser comparado.
+
+    Returns:
+        np.ndarray: O número de bits diferentes para cada hash.
+    """
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8)).reshape(-1, HASH_BITS).sum(axis=1)
+
+
+class DedupIndex:
+    def __init__(
+        self,
+        index_path: str | Path,
+        mode: str = "skip",
+        perceptual: bool = False,
+        threshold: int = 5,
+    ) -> None:
+        """
+        Índice em disco de arquivos já convertidos.
+
+        Parameters:
+            index_path (str | Path): O arquivo JSON onde o índice é salvo.
+            mode (str): "skip" ignora duplicatas; "link" cria hard links para a
+                        saída já convertida e remove a duplicata.
+            perceptual (bool): Também detecta imagens quase iguais. Elas são
+                               apenas ignoradas, nunca vinculadas ou removidas.
+            threshold (int): Máximo de bits diferentes entre hashes perceptuais
+                             para que duas imagens sejam consideradas iguais.
+        """
+        if mode not in ("skip", "link"):
+            raise ValueError(f"Modo de deduplicação inválido: {mode}")
+
+        self.index_path = Path(index_path)
+        self.mode = mode
+        self.perceptual = perceptual
+        self.threshold = threshold
+        self.entries: Dict[str, dict] = {}
+        self._hash_cache: Dict[str, Tuple[int, int, str, Optional[int]]] = {}
+        self._phash_keys: List[str] = []
+        self._phash_array: Optional[np.ndarray] = None
+        self.load()
+
+    @classmethod
+    def for_path(cls, path: str | Path, **kwargs) -> DedupIndex:
+        """Cria o índice dentro do diretório (ou do diretório do arquivo)."""
+        path = Path(path).resolve()
+        directory = path if path.is_dir() else path.parent
+        return cls(directory / INDEX_FILE_NAME, **kwargs)
+
+    def load(self) -> None:
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, encoding="utf-8") as file:
+            data = json.load(file)
+        self.entries = data.get("entries", {})
+        self._hash_cache = {
+            path: tuple(value) for path, value in data.get("cache", {}).items()
+        }
+        self._phash_array = None
+
+    def save(self) -> None:
+        self.prune()
+        # Escreve em um arquivo temporário para não corromper o índice
+        temp_path = self.index_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"entries": self.entries, "cache": self._hash_cache}, file)
+        os.replace(temp_path, self.index_path)
+
+    def hash_file(self, file_path: str | Path) -> Tuple[str, Optional[int]]:
+        """
+        Retorna o hash de conteúdo e o hash perceptual de um arquivo.
+
+        Os resultados ficam em cache pelo caminho, tamanho e data de modificação,
+        então arquivos inalterados não são lidos de novo.
+        """
+        file_path = Path(file_path).resolve()
+        stat = file_path.stat()
+        cached = self._hash_cache.get(str(file_path))
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2], cached[3]
+
+        digest = content_hash(file_path)
+        phash = None
+        if self.perceptual and is_img(file_path):
+            phash = perceptual_hash(file_path)
+        self._hash_cache[str(file_path)] = (
+            stat.st_size,
+            stat.st_mtime_ns,
+            digest,
+            phash,
+        )
+        return digest, phash
+
+    def scan(
+        self, paths: Iterable[str | Path], max_workers: Optional[int] = None
+    ) -> None:
+        """Calcula os hashes de vários arquivos em paralelo."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.hash_file, paths))
+
+    def _near_duplicates(self, phash: int) -> List[str]:
+        if self._phash_array is None:
+            self._phash_keys = [
+                key
+                for key, entry in self.entries.items()
+                if entry.get("phash") is not None
+            ]
+            self._phash_array = np.array(
+                [self.entries[key]["phash"] for key in self._phash_keys],
+                dtype=np.uint64,
+            )
+        if not self._phash_keys:
+            return []
+
+        # Compara o hash com todo o índice de uma vez, do mais parecido ao menos
+        distances = hamming_distances(self._phash_array, phash)
+        return [
+            self._phash_keys[i]
+            for i in np.argsort(distances, kind="stable")
+            if distances[i] <= self.threshold
+        ]
+
+    def find(
+        self, file_path: Path, digest: str, phash: Optional[int], profile: str
+    ) -> Tuple[Optional[dict], bool]:
+        """
+        Procura uma conversão já feita para o mesmo conteúdo.
+
+        Parameters:
+            file_path (Path): O arquivo sendo convertido.
+            digest (str): O hash de conteúdo do arquivo.
+            phash (int): O hash perceptual, se houver.
+            profile (str): Identifica o conversor, os formatos alvo e as opções.
+
+        Returns:
+            tuple: A conversão registrada (ou None se não houver uma válida) e se
+            ela é do mesmo conteúdo (True) ou apenas de uma imagem parecida.
+        """
+        keys = [digest]
+        if phash is not None and self.perceptual:
+            keys.extend(key for key in self._near_duplicates(phash) if key != digest)
+
+        for key in keys:
+            conversion = self.entries.get(key, {}).get("outputs", {}).get(profile)
+            # Ignora conversões cujas saídas foram apagadas
+            if not conversion or not self._outputs_exist(conversion):
+                continue
+            # Uma versão editada do próprio arquivo precisa ser convertida de novo
+            if conversion.get("source") == str(file_path) and key != digest:
+                stat = file_path.stat()
+                recorded = (
+                    conversion.get("source_size"),
+                    conversion.get("source_mtime"),
+                )
+                if recorded != (stat.st_size, stat.st_mtime_ns):
+                    continue
+            return conversion, key == digest
+        return None, False
+
+    @staticmethod
+    def _outputs_exist(conversion: dict) -> bool:
+        return all(Path(p).exists() for p in conversion["paths"])
+
+    def is_output(self, file_path: Path) -> bool:
+        """Verifica se o arquivo é a saída de uma conversão registrada."""
+        file_path = str(Path(file_path).resolve())
+        return any(
+            file_path in conversion["paths"] or file_path in conversion.get("links", [])
+            for entry in self.entries.values()
+            for conversion in entry["outputs"].values()
+        )
+
+    def register(
+        self,
+        digest: str,
+        phash: Optional[int],
+        profile: str,
+        source: Path,
+        source_stat: os.stat_result,
+        outputs: List[Path],
+    ) -> None:
+        entry = self.entries.setdefault(digest, {"phash": phash, "outputs": {}})
+        entry["outputs"][profile] = {
+            "stem": source.stem,
+            "source": str(source),
+            "source_size": source_stat.st_size,
+            "source_mtime": source_stat.st_mtime_ns,
+            "paths": [str(Path(output).resolve()) for output in outputs],
+        }
+        self._phash_array = None
+
+    def prune(self) -> None:
+        """Remove do índice conversões sem saídas e hashes de arquivos apagados."""
+        for digest, entry in list(self.entries.items()):
+            entry["outputs"] = {
+                profile: conversion
+                for profile, conversion in entry["outputs"].items()
+                if self._outputs_exist(conversion)
+            }
+            if not entry["outputs"]:
+                del self.entries[digest]
+                continue
+            for conversion in entry["outputs"].values():
+                if "links" in conversion:
+                    conversion["links"] = [
+                        link for link in conversion["links"] if Path(link).exists()
+                    ]
+
+        for path, cached in list(self._hash_cache.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self._hash_cache[path]
+                continue
+            if (cached[0], cached[1]) != (stat.st_size, stat.st_mtime_ns):
+                del self._hash_cache[path]
+        self._phash_array = None
+
+    def link(self, file_path: Path, conversion: dict) -> List[Path]:
+        """Cria hard links com o nome do arquivo para as saídas já convertidas."""
+        links = []
+        for output in map(Path, conversion["paths"]):
+            link_path = file_path.with_name(
+                file_path.stem + output.name[len(conversion["stem"]) :]
+            )
+            if link_path.exists() and link_path.samefile(output):
+                links.append(link_path)
+                continue
+            if link_path.exists():
+                os.remove(link_path)
+            try:
+                os.link(output, link_path)
+            except OSError:
+                # Hard links não funcionam entre sistemas de arquivos diferentes
+                shutil.copy2(output, link_path)
+            links.append(link_path)
+        return links
+
+    def convert(
+        self,
+        file_path: str | Path,
+        convert: Callable[[Path], object],
+        profile: str,
+    ) -> List[Path]:
+        """
+        Converte um arquivo apenas se o seu conteúdo ainda não foi convertido.
+
+        Parameters:
+            file_path (str | Path): O arquivo a ser convertido.
+            convert (Callable): Converte o arquivo e retorna a saída (ou uma lista).
+            profile (str): Identifica o conversor e os formatos alvo.
+
+        Returns:
+            List[Path]: As saídas convertidas ou reaproveitadas.
+        """
+        file_path = Path(file_path).resolve()
+        if self.is_output(file_path):
+            print(f"Saída de uma conversão anterior ignorada: {file_path}")
+            return []
+
+        source_stat = file_path.stat()
+        digest, phash = self.hash_file(file_path)
+        conversion, exact = self.find(file_path, digest, phash, profile)
+
+        if conversion is not None:
+            # O próprio arquivo, visto de novo: já foi convertido
+            if conversion.get("source") == str(file_path):
+                print(f"Arquivo já convertido: {file_path}")
+                return [Path(p) for p in conversion["paths"]]
+            # Uma imagem apenas parecida tem conteúdo próprio: nunca é removida
+            if self.mode == "skip" or not exact:
+                print(f"Duplicata ignorada: {file_path}")
+                return []
+            links = self.link(file_path, conversion)
+            # Os links também são saídas: não são convertidos numa próxima vez
+            known = conversion.setdefault("links", [])
+            for link in map(str, links):
+                if link not in known and link not in conversion["paths"]:
+                    known.append(link)
+            if file_path not in links:
+                os.remove(file_path)
+            self._hash_cache.pop(str(file_path), None)
+            print(f"Duplicata vinculada: {file_path} -> {', '.join(map(str, links))}")
+            return links
+
+        result = convert(file_path)
+        results = result if isinstance(result, list) else [result]
+        outputs = [Path(output) for output in results if output]
+        if outputs:
+            self.register(digest, phash, profile, file_path, source_stat, outputs)
+        self._hash_cache.pop(str(file_path), None)
+        return outputs
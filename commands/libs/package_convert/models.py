@@ -2,12 +2,20 @@ from __future__ import annotations
 
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
 
 from PIL import Image
 
 from commands.libs.utils import get_existent_file_path, is_img
 
+if TYPE_CHECKING:
+    from commands.libs.package_convert.dedup import DedupIndex
+
+# Um alvo de conversão: (formato, tamanho máximo opcional em pixels)
+ConversionTarget = Tuple[str, Optional[Tuple[int, int]]]
+
 
 class Conversor(ABC):
     @abstractmethod
@@ -16,6 +24,14 @@ class Conversor(ABC):
 
 
 class BaseConverter(Conversor):
+    def is_supported_file(self, file_path: str | Path) -> bool:
+        """Checks if a file found in a directory should be converted."""
+        return is_img(file_path)
+
+    def dedup_profile(self) -> str:
+        """Identifica o conversor e as suas opções no índice de duplicatas."""
+        return type(self).__name__
+
     def rename_file(self, file_path: str | Path, new_name: str) -> Path:
         """
         Renomeia a imagem com um novo nome baseado no contador.
@@ -42,22 +58,50 @@ class BaseConverter(Conversor):
 
         return new_file_path
 
-    def process_path(self, directory: str | Path) -> None:
+    def iter_files(self, directory: str | Path) -> Iterator[Path]:
+        """
+        Percorre os arquivos a serem convertidos em um caminho.
+
+        Parameters:
+            directory (str | Path): Um arquivo ou um diretório.
+
+        Returns:
+            Iterator[Path]: O próprio arquivo, ou os arquivos suportados do diretório.
+        """
         # Transforma o diretório em um Path
         directory = Path(directory).resolve()
 
         # Verifica se o diretório é um arquivo
         if directory.is_file():
-            self.convert(directory)
+            yield directory
             return
 
         # Percorre todos os arquivos no diretório
         for file in os.listdir(directory):
             file_path = os.path.join(directory, file)
 
-            # Verifica se é um arquivo e se é uma imagem
-            if is_img(file_path):
+            # Verifica se é um arquivo e se é suportado pelo conversor
+            if self.is_supported_file(file_path):
+                yield Path(file_path)
+
+    def process_path(
+        self, directory: str | Path, dedup: Optional[DedupIndex] = None
+    ) -> None:
+        if dedup is None:
+            for file_path in self.iter_files(directory):
                 self.convert(file_path)
+            return
+
+        # Calcula os hashes de todo o lote antes de converter
+        files = list(self.iter_files(directory))
+        dedup.scan(files)
+        profile = self.dedup_profile()
+        try:
+            for file_path in files:
+                dedup.convert(file_path, self.convert, profile)
+        finally:
+            # Salva o que já foi convertido mesmo se um arquivo falhar
+            dedup.save()
 
 
 class ConversorManager(ABC):
@@ -85,7 +129,30 @@ class BaseIMGConverter(BaseConverter):
         """
         return set(Image.registered_extensions())
 
-    def convert(self, file_path: str | Path, target_format=None) -> None:
+    def _resolve_format(self, file_path: Path, target_format=None) -> str:
+        # Se o formato alvo não for fornecido, tenta determinar automaticamente com base na extensão
+        return (
+            target_format.upper().replace("-", "")
+            if target_format
+            else file_path.suffix[1:].upper()
+        )
+
+    def get_output_path(self, file_path: str | Path, target_format=None) -> Path:
+        """
+        Returns the path that convert() writes for a file.
+
+        Parameters:
+            file_path (str): The path to the input file.
+            target_format (str): The target format, as accepted by convert().
+
+        Returns:
+            Path: The path of the converted image.
+        """
+        file_path = Path(file_path)
+        target_format = self._resolve_format(file_path, target_format)
+        return file_path.with_name(f"{file_path.stem}.{target_format.lower()}")
+
+    def convert(self, file_path: str | Path, target_format=None) -> Path:
         """
         Common conversion logic for all converters.
 
@@ -97,25 +164,20 @@ class BaseIMGConverter(BaseConverter):
         Raises:
             FileNotFoundError: If the input file does not exist.
             ValueError: If the target format is not supported.
+
+        Returns:
+            Path: The path of the converted image.
         """
 
         file_path = get_existent_file_path(file_path)
-        directory, file_name = file_path.parent, file_path.stem
-        extensao = file_path.suffix
-
-        # Se o formato alvo não for fornecido, tenta determinar automaticamente com base na extensão
-        target_format = (
-            target_format.upper().replace("-", "")
-            if target_format
-            else extensao[1:].upper()
-        )
+        target_format = self._resolve_format(file_path, target_format)
 
         # Verifica se o formato alvo é suportado
         # if target_format not in self._supported_extensions:
         #     raise ValueError(f"Unsupported target format: {target_format}")
 
         # Cria o novo caminho com a extensão correta
-        novo_caminho = os.path.join(directory, f"{file_name}.{target_format.lower()}")
+        novo_caminho = self.get_output_path(file_path, target_format)
 
         # Abre a imagem e a salva no formato alvo
         with Image.open(file_path) as img:
@@ -125,6 +187,103 @@ class BaseIMGConverter(BaseConverter):
         os.remove(file_path)
 
         print(f"Imagem convertida: {file_path} -> {novo_caminho}")
+        return novo_caminho
+
+    def convert_many(
+        self,
+        file_path: str | Path,
+        targets: List[ConversionTarget],
+        max_workers: Optional[int] = None,
+    ) -> List[Path]:
+        """
+        Converts one image into several formats/resolutions with a single decode.
+
+        The source is opened and decoded once; every target is then encoded from
+        the in-memory image on a thread pool (Pillow releases the GIL while
+        encoding). The original file is only removed after all outputs were
+        written, and never if one of the outputs replaced it.
+
+        Parameters:
+            file_path (str): The path to the input file.
+            targets (List[ConversionTarget]): Pairs of (format, size). When size is
+                                given, the output is a thumbnail that fits in it.
+            max_workers (int): Maximum number of parallel encoders.
+
+        Raises:
+            FileNotFoundError: If the input file does not exist.
+            ValueError: If a target format is not supported.
+
+        Returns:
+            List[Path]: The paths of the written files.
+        """
+        file_path = get_existent_file_path(file_path)
+        registered = Image.registered_extensions()
+
+        jobs = []
+        for target_format, size in targets:
+            extension = target_format.lower().replace("-", "")
+            pil_format = registered.get(f".{extension}")
+            if pil_format is None:
+                raise ValueError(f"Unsupported target format: {target_format}")
+
+            suffix = f"_{size[0]}x{size[1]}" if size else ""
+            novo_caminho = file_path.with_name(
+                f"{file_path.stem}{suffix}.{extension}"
+            )
+            # Dois encoders não podem escrever no mesmo arquivo ao mesmo tempo
+            if any(novo_caminho == job[0] for job in jobs):
+                raise ValueError(f"Alvos repetidos para a saída: {novo_caminho}")
+            jobs.append((novo_caminho, pil_format, size))
+
+        # Decodifica a imagem uma única vez
+        with Image.open(file_path) as img:
+            img.load()
+            source = img.copy()
+
+        def encode(job) -> Path:
+            novo_caminho, pil_format, size = job
+            # Cada encoder recebe sua própria cópia: save() altera o objeto
+            image = source.copy()
+            if size:
+                image.thumbnail(size)
+            # JPEG não suporta transparência nem paleta
+            if pil_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+                image = image.convert("RGB")
+            image.save(novo_caminho, format=pil_format)
+            return novo_caminho
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outputs = list(executor.map(encode, jobs))
+
+        # Opcional: Remove o arquivo original
+        if file_path not in outputs:
+            os.remove(file_path)
+
+        for output in outputs:
+            print(f"Imagem convertida: {file_path} -> {output}")
+        return outputs
+
+    def process_path_many(
+        self,
+        directory: str | Path,
+        targets: List[ConversionTarget],
+        dedup: Optional[DedupIndex] = None,
+    ) -> None:
+        if dedup is None:
+            for file_path in self.iter_files(directory):
+                self.convert_many(file_path, targets)
+            return
+
+        files = list(self.iter_files(directory))
+        dedup.scan(files)
+        profile = f"{self.dedup_profile()}:{targets}"
+        try:
+            for file_path in files:
+                dedup.convert(
+                    file_path, lambda path: self.convert_many(path, targets), profile
+                )
+        finally:
+            dedup.save()
 
 
 class BaseVideoConverter(BaseConverter):
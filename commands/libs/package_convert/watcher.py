@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from commands.libs.package_convert.models import BaseConverter
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifySource:
+    def __init__(self, directory: Path) -> None:
+        """
+        Eventos de arquivos criados ou alterados em um diretório, via inotify.
+
+        Raises:
+            OSError: Se o inotify não estiver disponível.
+        """
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc não encontrada")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify não suportado")
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "Falha ao iniciar o inotify")
+
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        watch = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), ctypes.c_uint32(mask)
+        )
+        if watch < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"Falha ao observar {directory}")
+        self.directory = directory
+
+    def poll(self, timeout: float) -> Iterator[Path]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Eventos foram descartados pelo kernel: varre o diretório todo
+                print("Fila do inotify cheia, varrendo o diretório novamente.")
+                yield from self.directory.iterdir()
+            elif name:
+                yield self.directory / os.fsdecode(name)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingSource:
+    def __init__(self, directory: Path, interval: float = 1.0) -> None:
+        """Eventos de arquivos criados ou alterados, comparando varreduras."""
+        self.directory = directory
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout: float) -> Iterator[Path]:
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        for name, signature in snapshot.items():
+            if self._snapshot.get(name) != signature:
+                yield self.directory / name
+        self._snapshot = snapshot
+
+    def close(self) -> None:
+        ...
+
+
+class FolderWatcher:
+    def __init__(
+        self,
+        directory: str | Path,
+        converter: BaseConverter,
+        settle: float = 1.0,
+        max_workers: Optional[int] = None,
+        max_queue: int = 32,
+        report_interval: float = 30.0,
+        use_polling: bool = False,
+    ) -> None:
+        """
+        Converte automaticamente os arquivos novos ou alterados de um diretório.
+
+        Parameters:
+            directory (str | Path): O diretório observado.
+            converter (BaseConverter): O conversor usado em cada arquivo. Precisa
+                                       informar a saída via get_output_path().
+            settle (float): Segundos sem alterações para o arquivo ser convertido,
+                            evitando arquivos ainda sendo escritos.
+            max_workers (int): Número de conversões simultâneas.
+            max_queue (int): Máximo de arquivos aguardando ou em conversão.
+            report_interval (float): Intervalo, em segundos, entre os relatórios.
+            use_polling (bool): Força a varredura periódica em vez do inotify.
+        """
+        self.directory = Path(directory).resolve()
+        if not self.directory.is_dir():
+            raise NotADirectoryError(f"{self.directory} não é um diretório")
+
+        self.converter = converter
+        self.settle = settle
+        self.report_interval = report_interval
+        self.use_polling = use_polling
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._pending: Dict[Path, Tuple[float, int, int]] = {}
+        self._in_progress: set[Path] = set()
+        # Saída -> momento em que a conversão terminou (None enquanto converte)
+        self._produced: Dict[Path, Optional[float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.converted = 0
+        self.failed = 0
+        self._started_at = time.monotonic()
+
+    def _open_source(self):
+        if not self.use_polling:
+            try:
+                return InotifySource(self.directory)
+            except OSError as e:
+                print(f"inotify indisponível ({e}), usando varredura periódica.")
+        return PollingSource(self.directory)
+
+    def _accepts(self, file_path: Path) -> bool:
+        # Ignora as próprias saídas da conversão
+        if file_path in self._produced:
+            return False
+        return self.converter.is_supported_file(file_path)
+
+    def _expire_produced(self) -> None:
+        # Os eventos de escrita da saída já foram lidos após um período de settle
+        now = time.monotonic()
+        with self._lock:
+            for output_path, done_at in list(self._produced.items()):
+                if done_at is not None and now - done_at >= self.settle:
+                    del self._produced[output_path]
+
+    def _touch(self, file_path: Path) -> None:
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            self._pending.pop(file_path, None)
+            return
+        self._pending[file_path] = (time.monotonic(), stat.st_size, stat.st_mtime_ns)
+
+    def _ready_files(self) -> Iterator[Path]:
+        now = time.monotonic()
+        for file_path, (seen_at, size, mtime) in list(self._pending.items()):
+            if now - seen_at < self.settle:
+                continue
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                del self._pending[file_path]
+                continue
+            # O arquivo mudou desde o último evento: ainda está sendo escrito
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self._pending[file_path] = (now, stat.st_size, stat.st_mtime_ns)
+                continue
+            del self._pending[file_path]
+            yield file_path
+
+    def _submit(self, file_path: Path) -> None:
+        if file_path in self._produced:
+            return
+
+        try:
+            output_path = Path(self.converter.get_output_path(file_path)).resolve()
+        except Exception as e:
+            print(f"Arquivo ignorado {file_path}: {e}")
+            return
+        # Converter o arquivo sobre ele mesmo o apagaria
+        if output_path == file_path:
+            return
+
+        with self._lock:
+            if file_path in self._in_progress:
+                return
+            self._in_progress.add(file_path)
+            # Registra a saída antes da conversão para ignorar os seus eventos
+            self._produced[output_path] = None
+
+        # Bloqueia enquanto a fila estiver cheia
+        while not self._slots.acquire(timeout=0.5):
+            if self._stop.is_set():
+                with self._lock:
+                    self._in_progress.discard(file_path)
+                    self._produced.pop(output_path, None)
+                return
+        future = self._executor.submit(self.converter.process_path, file_path)
+        future.add_done_callback(lambda f: self._done(file_path, output_path, f))
+
+    def _done(self, file_path: Path, output_path: Path, future: Future) -> None:
+        error = future.exception()
+        with self._lock:
+            self._in_progress.discard(file_path)
+            self._produced[output_path] = time.monotonic()
+            if error is None:
+                self.converted += 1
+            else:
+                self.failed += 1
+        self._slots.release()
+        if error is not None:
+            print(f"Erro ao converter {file_path}: {error}")
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the throughput and queue depth of the watcher.
+
+        Returns:
+            dict: Converted and failed files, files per second, files in
+            conversion and files waiting to settle.
+        """
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        with self._lock:
+            return {
+                "converted": self.converted,
+                "failed": self.failed,
+                "files_per_second": round(self.converted / elapsed, 3),
+                "in_progress": len(self._in_progress),
+                "pending": len(self._pending),
+            }
+
+    def report(self) -> None:
+        stats = self.stats()
+        print(
+            f"Convertidos: {stats['converted']} | Falhas: {stats['failed']} | "
+            f"{stats['files_per_second']} arquivos/s | "
+            f"Em conversão: {stats['in_progress']} | Aguardando: {stats['pending']}"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        """Observa o diretório até stop() ser chamado ou o usuário interromper."""
+        source = self._open_source()
+        self._started_at = time.monotonic()
+        last_report = self._started_at
+        print(f"Observando {self.directory}. Pressione Ctrl+C para parar.")
+
+        # Arquivos que já estavam no diretório também são convertidos
+        for file_path in self.directory.iterdir():
+            if self._accepts(file_path):
+                self._touch(file_path)
+
+        try:
+            while not self._stop.is_set():
+                for file_path in source.poll(timeout=self.settle / 2):
+                    if self._accepts(file_path):
+                        self._touch(file_path)
+
+                for file_path in self._ready_files():
+                    self._submit(file_path)
+                self._expire_produced()
+
+                if time.monotonic() - last_report >= self.report_interval:
+                    self.report()
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("\nObservação interrompida.")
+            source.close()
+            self._executor.shutdown(wait=True)
+            self.report()
@@ -44,6 +44,45 @@ def is_img(file):
     return False
 
 
+def parse_target_format(arg: str) -> tuple[str, tuple[int, int] | None]:
+    """
+    Split a conversion target such as "-png", "-png:256" or "-mp4:720x1280".
+
+    Args:
+        arg (str): The target given on the command line.
+    Returns:
+        tuple: The format (with the leading dash) and the optional (width, height).
+        A single number is used for both dimensions.
+    Raises:
+        ValueError: If the size is not made of positive integers.
+    """
+    target_format, _, size = arg.partition(":")
+    if not size:
+        return target_format.lower(), None
+
+    dimensions = size.lower().split("x")
+    if len(dimensions) == 1:
+        dimensions *= 2
+    if len(dimensions) != 2 or not all(d.isdigit() and int(d) > 0 for d in dimensions):
+        raise ValueError(f"Tamanho inválido: {size}")
+    return target_format.lower(), (int(dimensions[0]), int(dimensions[1]))
+
+
+def is_audio(file):
+    extensoes_suportadas = [".mp3", ".wav", ".flac", ".ogg", ".aac", ".m4a", ".mp4"]
+
+    # Verifica se o path é um arquivo
+    if os.path.isfile(file):
+        # Obtém a extensão do arquivo
+        _, extensao = os.path.splitext(file)
+
+        # Verifica se a extensão está na lista de extensões suportadas
+        if extensao.lower() in extensoes_suportadas:
+            return True
+
+    return False
+
+
 def is_valid_url(input_string):
     try:
         result = urlparse(input_string)
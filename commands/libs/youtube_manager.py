@@ -5,6 +5,7 @@ from pathlib import Path
 import moviepy.editor as mpe
 from pytube import Search, YouTube
 
+from commands.libs.http_transport import get_transport
 from commands.libs.utils import is_valid_url
 
 BASE_ROOT = Path(os.path.dirname(os.path.abspath(sys.argv[0])))
@@ -29,6 +30,8 @@ class AudioEditor:
 
 class YoutubeDownloader:
     def __init__(self):
+        self.transport = get_transport()
+        self.transport.install_pytube()
         self.yt = None
         self.audio_file = ""
         self.audio_file_name = ""
@@ -77,6 +80,8 @@ class YoutubeDownloader:
 
 class YoutubeSearch:
     def __init__(self):
+        self.transport = get_transport()
+        self.transport.install_pytube()
         self.result = None
 
     def search_one(self, input_text: str):